@@ -0,0 +1,139 @@
+import argparse
+import os
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from Lab_4 import add_area, add_image_shape, create_df
+
+DEFAULT_RATIO_EDGES = (0.5, 0.67, 0.8, 0.9, 1.1, 1.25, 1.5, 2.0)
+DEFAULT_AREA_BINS = 4
+
+
+def create_parse() -> argparse.Namespace:
+    '''
+    Creates argument parser for command line interface.
+    :return: Parsed command line arguments
+    '''
+    parser = argparse.ArgumentParser(description="Groups images into aspect ratio buckets for batching")
+    parser.add_argument("annotation_path", type=str, help="Path to annotation")
+    parser.add_argument("batch_size", type=int, help="Number of images in a batch")
+    parser.add_argument("output_path", type=str, help="Path to .npz file with batch indices")
+    parser.add_argument("--area-bins", type=int, default=DEFAULT_AREA_BINS, help="Number of size buckets")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for shuffling")
+    return parser.parse_args()
+
+
+def add_bucket(
+        df: pd.DataFrame,
+        ratio_edges: Tuple[float, ...] = DEFAULT_RATIO_EDGES,
+        area_bins: int = DEFAULT_AREA_BINS,
+) -> pd.DataFrame:
+    '''
+    Adds aspect ratio and bucket columns. A bucket is a pair of an aspect ratio range
+    and an area quantile range, so images of one bucket have close shapes.
+    :param df: DataFrame with image dimensions and area
+    :param ratio_edges: Edges of aspect ratio (width / height) ranges
+    :param area_bins: Number of area ranges, split by quantiles
+    :return: DataFrame with added aspect_ratio and bucket columns
+    '''
+    if 'area' not in df.columns:
+        raise RuntimeError("Failed to add bucket column")
+    if area_bins <= 0:
+        raise ValueError("Number of area bins must be positive")
+    df['aspect_ratio'] = df['width'] / df['height']
+    ratio_index = np.digitize(df['aspect_ratio'].to_numpy(), ratio_edges)
+    area_edges = np.quantile(df['area'].to_numpy(), np.linspace(0, 1, area_bins + 1)[1:-1])
+    area_index = np.digitize(df['area'].to_numpy(), area_edges)
+    df['bucket'] = ratio_index * area_bins + area_index
+    return df
+
+
+def bucket_batches(df: pd.DataFrame, batch_size: int, rng: np.random.Generator) -> List[np.ndarray]:
+    '''
+    Splits shuffled rows of every bucket into batches, so a batch never mixes buckets.
+    The last batch of a bucket may be smaller than batch_size.
+    :param df: DataFrame with bucket column
+    :param batch_size: Number of images in a batch
+    :param rng: Random generator
+    :return: Positional row indices of every batch, in shuffled order
+    '''
+    buckets = df['bucket'].to_numpy()
+    order = np.argsort(buckets, kind='stable')
+    starts = np.flatnonzero(np.diff(buckets[order], prepend=-1))
+    batches = []
+    for rows in np.split(order, starts[1:]):
+        rng.shuffle(rows)
+        batches.extend(np.split(rows, np.arange(batch_size, len(rows), batch_size)))
+    return [batches[i] for i in rng.permutation(len(batches))]
+
+
+def random_batches(df: pd.DataFrame, batch_size: int, rng: np.random.Generator) -> List[np.ndarray]:
+    '''
+    Splits shuffled rows into batches regardless of image shapes.
+    :param df: DataFrame with image dimensions
+    :param batch_size: Number of images in a batch
+    :param rng: Random generator
+    :return: Positional row indices of every batch
+    '''
+    rows = rng.permutation(len(df))
+    return np.split(rows, np.arange(batch_size, len(rows), batch_size))
+
+
+def padding_overhead(df: pd.DataFrame, batches: List[np.ndarray]) -> float:
+    '''
+    Calculates how many padding pixels batches need when every image is padded
+    to the largest height and width of its batch.
+    :param df: DataFrame with image dimensions
+    :param batches: Positional row indices of every batch
+    :return: Padding pixels relative to image pixels
+    '''
+    order = np.concatenate(batches)
+    starts = np.cumsum([0] + [len(batch) for batch in batches[:-1]])
+    sizes = np.array([len(batch) for batch in batches])
+    heights = df['height'].to_numpy(dtype=np.int64)[order]
+    widths = df['width'].to_numpy(dtype=np.int64)[order]
+    padded = sizes * np.maximum.reduceat(heights, starts) * np.maximum.reduceat(widths, starts)
+    pixels = (heights * widths).sum()
+    return float(padded.sum() - pixels) / pixels
+
+
+def save_batches(df: pd.DataFrame, batches: List[np.ndarray], output_path: str) -> None:
+    '''
+    Saves batches to .npz file: "indices" holds DataFrame index labels of all batches in a row,
+    "offsets" holds the start of every batch in "indices" and the total length at the end.
+    :param df: DataFrame the batches were made from
+    :param batches: Positional row indices of every batch
+    :param output_path: Path to .npz file
+    '''
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    offsets = np.cumsum([0] + [len(batch) for batch in batches])
+    np.savez(output_path, indices=df.index.to_numpy()[np.concatenate(batches)], offsets=offsets)
+
+
+def main() -> None:
+    '''
+    Builds bucketed batches, saves them and prints padding overhead compared to random batching.
+    '''
+    try:
+        args = create_parse()
+        if args.batch_size <= 0:
+            raise ValueError("Batch size must be positive")
+        df = add_bucket(add_area(add_image_shape(create_df(args.annotation_path))), area_bins=args.area_bins)
+        rng = np.random.default_rng(args.seed)
+        batches = bucket_batches(df, args.batch_size, rng)
+        save_batches(df, batches, args.output_path)
+        bucketed = padding_overhead(df, batches)
+        shuffled = padding_overhead(df, random_batches(df, args.batch_size, rng))
+        print(df['bucket'].value_counts().sort_index())
+        print(f"Batches: {len(batches)}")
+        print(f"Padding overhead, bucketed: {bucketed:.1%}, random: {shuffled:.1%}")
+    except Exception as exc:
+        print(exc)
+
+
+if __name__ == '__main__':
+    main()
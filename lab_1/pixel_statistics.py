@@ -0,0 +1,146 @@
+import argparse
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+import pandas as pd
+
+from Lab_4 import create_df
+
+CHANNELS = ("blue", "green", "red")
+BINS = 256
+PENDING_PER_WORKER = 4
+READ_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+Moments = Tuple[int, np.ndarray, np.ndarray, np.ndarray]
+
+
+def create_parse() -> argparse.Namespace:
+    '''
+    Creates argument parser for command line interface.
+    :return: Parsed command line arguments
+    '''
+    parser = argparse.ArgumentParser(description="Calculates per-channel pixel statistics of all images")
+    parser.add_argument("annotation_path", type=str, help="Path to annotation")
+    parser.add_argument("--workers", type=int, default=None, help="Number of decoding processes")
+    parser.add_argument(
+        "--reduction",
+        type=int,
+        default=1,
+        choices=list(READ_FLAGS),
+        help="Decode images downscaled by this factor, faster but slightly smooths the statistics",
+    )
+    return parser.parse_args()
+
+
+def image_moments(path: str, reduction: int = 1) -> Moments:
+    '''
+    Decodes one image and calculates its per-channel pixel count, mean, sum of squared
+    deviations from the mean and 256-bin histogram.
+    :param path: Path to image
+    :param reduction: Downscale factor applied while decoding
+    :return: Pixel count, means, sums of squared deviations and histograms of shape (3, 256)
+    '''
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Image file {path} not found.")
+    img = cv2.imread(path, READ_FLAGS[reduction])
+    if img is None:
+        raise RuntimeError(f"Failed to decode image {path}")
+    pixels = img.reshape(-1, len(CHANNELS))
+    mean = pixels.mean(axis=0, dtype=np.float64)
+    m2 = ((pixels - mean) ** 2).sum(axis=0)
+    histogram = np.bincount((pixels + np.arange(len(CHANNELS)) * BINS).ravel(), minlength=len(CHANNELS) * BINS)
+    return len(pixels), mean, m2, histogram.reshape(len(CHANNELS), BINS)
+
+
+def merge_moments(first: Moments, second: Moments) -> Moments:
+    '''
+    Merges statistics of two disjoint sets of pixels (parallel variance algorithm by Chan et al.).
+    :param first: Statistics of the first set
+    :param second: Statistics of the second set
+    :return: Statistics of the union
+    '''
+    count_a, mean_a, m2_a, histogram_a = first
+    count_b, mean_b, m2_b, histogram_b = second
+    count = count_a + count_b
+    if count == 0:
+        return first
+    delta = mean_b - mean_a
+    mean = mean_a + delta * count_b / count
+    m2 = m2_a + m2_b + delta ** 2 * count_a * count_b / count
+    return count, mean, m2, histogram_a + histogram_b
+
+
+def empty_moments() -> Moments:
+    '''
+    Creates statistics of an empty set of pixels.
+    :return: Zero pixel count, means, sums of squared deviations and histograms
+    '''
+    zeros = np.zeros(len(CHANNELS))
+    return 0, zeros, zeros, np.zeros((len(CHANNELS), BINS), dtype=np.int64)
+
+
+def dataset_moments(paths: pd.Series, workers: Optional[int] = None, reduction: int = 1) -> Moments:
+    '''
+    Decodes images in parallel processes and merges their statistics in completion order.
+    At most PENDING_PER_WORKER images per process are submitted at once, so memory does not
+    grow with the size of the dataset.
+    :param paths: Paths to images
+    :param workers: Number of processes, all CPUs by default
+    :param reduction: Downscale factor applied while decoding
+    :return: Statistics of all pixels of the dataset
+    '''
+    window = PENDING_PER_WORKER * (workers or os.cpu_count() or 1)
+    moments = empty_moments()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for path in paths:
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    moments = merge_moments(moments, future.result())
+            pending.add(executor.submit(image_moments, path, reduction))
+        for future in as_completed(pending):
+            moments = merge_moments(moments, future.result())
+    return moments
+
+
+def save_statistics(moments: Moments, annotation_path: str) -> Tuple[str, str]:
+    '''
+    Saves per-channel mean and std and the histograms next to the annotation file.
+    :param moments: Statistics of the dataset
+    :param annotation_path: Path to annotation
+    :return: Paths of the statistics and histogram CSV files
+    '''
+    count, mean, m2, histogram = moments
+    stem = os.path.splitext(annotation_path)[0]
+    stats_path, histogram_path = f"{stem}_pixel_stats.csv", f"{stem}_pixel_histogram.csv"
+    std = np.sqrt(m2 / count) if count else np.zeros(len(CHANNELS))
+    pd.DataFrame({"channel": CHANNELS, "pixels": count, "mean": mean, "std": std}).to_csv(stats_path, index=False)
+    pd.DataFrame(histogram.T, columns=CHANNELS).rename_axis("intensity").to_csv(histogram_path)
+    return stats_path, histogram_path
+
+
+def main() -> None:
+    '''
+    Calculates pixel statistics of the images listed in the annotation and saves them.
+    '''
+    try:
+        args = create_parse()
+        df = create_df(args.annotation_path)
+        moments = dataset_moments(df["relative path"], args.workers, args.reduction)
+        for path in save_statistics(moments, args.annotation_path):
+            print(pd.read_csv(path).head(len(CHANNELS)))
+    except Exception as exc:
+        print(exc)
+
+
+if __name__ == '__main__':
+    main()
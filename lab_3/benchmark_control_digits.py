@@ -0,0 +1,96 @@
+import argparse
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from control_digits import CONTROL_DIGIT_VALIDATORS, ROW_VALIDATORS
+
+"""
+Compares the vectorised control digit validators with their per-row counterparts.
+Values are random digit strings of the field layouts, so only a part of them has correct control digits.
+"""
+
+LAYOUTS: Dict[str, List[str]] = {
+    "snils": ["###########"],
+    "inn": ["############"],
+    "isbn": ["###-#-#####-###-#", "#-#####-###-?"],
+    "issn": ["####-###?"],
+}
+
+_DIGIT_CODES = np.array([ord(char) for char in "0123456789"], dtype=np.uint32)
+_CHECK_DIGIT_CODES = np.array([ord(char) for char in "0123456789X"], dtype=np.uint32)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    '''
+    Creates argument parser for command line interface.
+    :return: Argument parser
+    '''
+    parser = argparse.ArgumentParser(description="Benchmarks control digit validators")
+    parser.add_argument("-n", "--rows", type=int, default=1_000_000, help="Number of values per field")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Random seed")
+    return parser
+
+
+def random_values(rng: np.random.Generator, rows: int, layout: str) -> np.ndarray:
+    '''
+    Generates random values of the given layout: "#" in the layout is replaced with a random digit
+    and "?" with a random digit or "X".
+    :param rng: Random generator
+    :param rows: Number of values
+    :param layout: Value layout, e.g. "####-###?"
+    :return: Array of generated values
+    '''
+    chars = np.tile(np.array([ord(char) for char in layout], dtype=np.uint32), (rows, 1))
+    for placeholder, codes in (("#", _DIGIT_CODES), ("?", _CHECK_DIGIT_CODES)):
+        columns = [i for i, char in enumerate(layout) if char == placeholder]
+        chars[:, columns] = codes[rng.integers(0, len(codes), size=(rows, len(columns)))]
+    return chars.view(f"<U{len(layout)}").ravel()
+
+
+def field_values(rng: np.random.Generator, rows: int, layouts: List[str]) -> pd.Series:
+    '''
+    Generates random values split evenly between the layouts of a field and shuffled.
+    :param rng: Random generator
+    :param rows: Number of values
+    :param layouts: Value layouts of the field
+    :return: Series of generated values
+    '''
+    counts = np.diff(np.linspace(0, rows, len(layouts) + 1).astype(int))
+    values = np.concatenate([random_values(rng, count, layout).astype(object)
+                             for count, layout in zip(counts, layouts)])
+    return pd.Series(values[rng.permutation(rows)])
+
+
+def measure(function: Callable[[], np.ndarray]) -> tuple:
+    '''
+    Runs the function once and measures its wall time.
+    :param function: Function to run
+    :return: Function result and elapsed seconds
+    '''
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    '''
+    Runs the benchmark for every field and prints timings.
+    '''
+    args = create_parser().parse_args()
+    rng = np.random.default_rng(args.seed)
+    print(f"{'field':<8}{'valid':>10}{'per-row, s':>14}{'numpy, s':>12}{'speedup':>10}")
+    for field, layouts in LAYOUTS.items():
+        values = field_values(rng, args.rows, layouts)
+        row_validator = ROW_VALIDATORS[field]
+        expected, row_time = measure(lambda: np.fromiter(map(row_validator, values), dtype=bool, count=len(values)))
+        actual, numpy_time = measure(lambda: CONTROL_DIGIT_VALIDATORS[field](values))
+        if not np.array_equal(expected, actual):
+            raise RuntimeError(f"Validators disagree on field {field}")
+        print(f"{field:<8}{int(actual.sum()):>10}{row_time:>14.3f}{numpy_time:>12.3f}{row_time / numpy_time:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
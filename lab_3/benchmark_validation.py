@@ -0,0 +1,116 @@
+import argparse
+import csv
+import json
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Optional
+
+from checksum import calculate_checksum
+from generate_dataset import expected_paths
+from patterns import CSV_ENCODING, CSV_SEPARATOR, PATTERNS
+from validator import validate_csv
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+"""
+Throughput benchmark of validator implementations on a csv-file made by generate_dataset.py.
+Every implementation runs in a fresh process, so its peak resident memory is measured in isolation.
+Peak memory is taken from getrusage and is not reported on platforms without the resource module.
+getrusage reports it in bytes on macOS and in KiB on other Unix systems.
+"""
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+def create_parser() -> argparse.ArgumentParser:
+    '''
+    Creates argument parser for command line interface.
+    :return: Argument parser
+    '''
+    parser = argparse.ArgumentParser(description="Benchmarks validator implementations")
+    parser.add_argument("csv_path", type=str, help="Path to csv-file made by generate_dataset.py")
+    parser.add_argument(
+        "-m", "--implementations",
+        nargs="+",
+        default=list(IMPLEMENTATIONS),
+        choices=list(IMPLEMENTATIONS),
+        help="Implementations to run",
+    )
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    return parser
+
+
+def validate_per_row(csv_path: str, chunk_size: int) -> List[int]:
+    '''
+    Baseline implementation: reads the file with the csv module and matches every value in a loop.
+    :param csv_path: Path to csv-file
+    :param chunk_size: Unused, kept for a common signature
+    :return: Sorted numbers of invalid rows
+    '''
+    invalid_rows = []
+    with open(csv_path, "r", encoding=CSV_ENCODING, newline="") as f:
+        reader = csv.reader(f, delimiter=CSV_SEPARATOR)
+        patterns = [re.compile(PATTERNS[column]) for column in next(reader)]
+        for row_number, row in enumerate(reader):
+            if not all(pattern.fullmatch(value) for pattern, value in zip(patterns, row)):
+                invalid_rows.append(row_number)
+    return invalid_rows
+
+
+IMPLEMENTATIONS: Dict[str, Callable[[str, int], List[int]]] = {
+    "per-row": validate_per_row,
+    "pandas": lambda csv_path, chunk_size: validate_csv(csv_path),
+    "pandas-chunked": lambda csv_path, chunk_size: validate_csv(csv_path, chunk_size=chunk_size),
+    "pandas-control-digits": lambda csv_path, chunk_size: validate_csv(csv_path, control_digits=True),
+}
+
+
+def _peak_memory_mib() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def run_implementation(name: str, csv_path: str, chunk_size: int) -> tuple:
+    '''
+    Runs one implementation and measures it, meant to be called in a fresh process.
+    :param name: Implementation name from IMPLEMENTATIONS
+    :param csv_path: Path to csv-file
+    :param chunk_size: Rows per chunk for chunked implementations
+    :return: Checksum, elapsed seconds and peak memory in MiB
+    '''
+    start = time.perf_counter()
+    invalid_rows = IMPLEMENTATIONS[name](csv_path, chunk_size)
+    elapsed = time.perf_counter() - start
+    return calculate_checksum(invalid_rows), elapsed, _peak_memory_mib()
+
+
+def main() -> None:
+    '''
+    Runs the selected implementations and prints rows/sec, peak memory and checksum correctness.
+    '''
+    try:
+        args = create_parser().parse_args()
+        with open(expected_paths(args.csv_path)[0], "r", encoding="utf-8") as f:
+            expected = json.load(f)
+        print(f"{'implementation':<24}{'rows/sec':>14}{'peak, MiB':>12}{'checksum':>10}")
+        for name in args.implementations:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                checksum, elapsed, peak = executor.submit(run_implementation, name, args.csv_path,
+                                                          args.chunk_size).result()
+            peak = "n/a" if peak is None else f"{peak:.1f}"
+            status = "ok" if checksum == expected["checksum"] else "WRONG"
+            print(f"{name:<24}{expected['rows'] / elapsed:>14,.0f}{peak:>12}{status:>10}")
+    except (FileNotFoundError, ValueError, OSError) as exc:
+        print(exc)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 import json
 import hashlib
+import os
 from typing import List
 
 """
@@ -38,7 +39,9 @@ def serialize_result(variant: int, checksum: str) -> None:
     :param variant: номер вашего варианта
     :param checksum: контрольная сумма, вычисленная через calculate_checksum()
     """
-    pass
+    result_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "result.json")
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump({"variant": str(variant), "checksum": checksum}, f, indent=2)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,206 @@
+import re
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from patterns import PATTERNS
+
+"""
+Validators for fields that carry a control digit: SNILS, INN, ISBN and ISSN.
+
+Every column validator first shape-checks the values with the field regex and then verifies
+the control digits of the surviving rows with NumPy arithmetic over the whole column:
+the strings are parsed into an integer matrix of digits once, and the weighted sums are
+computed as matrix-vector products instead of a Python loop per row.
+The *_row functions are plain per-row implementations of the same rules, kept as a reference
+and as a baseline for benchmark_control_digits.py.
+"""
+
+ColumnValidator = Callable[[pd.Series], np.ndarray]
+RowValidator = Callable[[str], bool]
+
+_X_DIGIT = ord("X") - ord("0")
+
+_SNILS_WEIGHTS = np.arange(9, 0, -1)
+_SNILS_NUMBER_WEIGHTS = 10 ** np.arange(8, -1, -1)
+_SNILS_UNCHECKED_MAX = 1001998
+_INN_WEIGHTS_11 = np.array([7, 2, 4, 10, 3, 5, 9, 4, 6, 8])
+_INN_WEIGHTS_12 = np.array([3, 7, 2, 4, 10, 3, 5, 9, 4, 6, 8])
+_ISBN10_WEIGHTS = np.arange(10, 0, -1)
+_ISBN13_WEIGHTS = np.array([1, 3] * 6 + [1])
+_ISSN_WEIGHTS = np.arange(8, 0, -1)
+
+
+def digit_matrix(values: pd.Series, width: int) -> np.ndarray:
+    '''
+    Parses strings of exactly `width` digits into an integer matrix, one row per value.
+    The character "X" is parsed as 10, as used by ISBN-10 and ISSN check digits.
+    :param values: Strings of length `width` consisting of digits and "X"
+    :param width: Number of characters in every value
+    :return: Array of shape (len(values), width) with dtype int64
+    '''
+    chars = np.asarray(values.to_numpy(dtype=str), dtype=f"<U{width}")
+    digits = chars.view(np.uint32).reshape(-1, width).astype(np.int64) - ord("0")
+    digits[digits == _X_DIGIT] = 10
+    return digits
+
+
+def _validate_column(
+        values: pd.Series,
+        pattern: str,
+        checks: Dict[int, Callable[[np.ndarray], np.ndarray]],
+) -> np.ndarray:
+    '''
+    Shape-checks a column with the field regex and verifies control digits of matching values.
+    :param values: Column of raw field values
+    :param pattern: Field regex from PATTERNS
+    :param checks: Control digit check for each possible digit count after removing hyphens
+    :return: Boolean mask of valid values
+    '''
+    values = values.astype(str)
+    valid = values.str.fullmatch(pattern).to_numpy(dtype=bool, copy=True)
+    compact = values.str.replace("-", "", regex=False)
+    lengths = compact.str.len().to_numpy()
+    for width, check in checks.items():
+        rows = np.flatnonzero(valid & (lengths == width))
+        if rows.size:
+            valid[rows] = check(digit_matrix(compact.iloc[rows], width))
+    return valid
+
+
+def _snils_check(digits: np.ndarray) -> np.ndarray:
+    control = digits[:, :9] @ _SNILS_WEIGHTS % 101 % 100
+    unchecked = digits[:, :9] @ _SNILS_NUMBER_WEIGHTS <= _SNILS_UNCHECKED_MAX
+    return unchecked | (control == digits[:, 9] * 10 + digits[:, 10])
+
+
+def _inn_check(digits: np.ndarray) -> np.ndarray:
+    first = digits[:, :10] @ _INN_WEIGHTS_11 % 11 % 10
+    second = digits[:, :11] @ _INN_WEIGHTS_12 % 11 % 10
+    return (first == digits[:, 10]) & (second == digits[:, 11])
+
+
+def _isbn10_check(digits: np.ndarray) -> np.ndarray:
+    return (digits[:, :9] < 10).all(axis=1) & (digits @ _ISBN10_WEIGHTS % 11 == 0)
+
+
+def _isbn13_check(digits: np.ndarray) -> np.ndarray:
+    return (digits < 10).all(axis=1) & (digits @ _ISBN13_WEIGHTS % 10 == 0)
+
+
+def _issn_check(digits: np.ndarray) -> np.ndarray:
+    return (digits[:, :7] < 10).all(axis=1) & (digits @ _ISSN_WEIGHTS % 11 == 0)
+
+
+def validate_snils(values: pd.Series) -> np.ndarray:
+    '''
+    Validates SNILS numbers: 9 digits of the number followed by a 2-digit control number.
+    Numbers up to 001-001-998 were issued without a control number and are not checked.
+    :param values: Column of SNILS values
+    :return: Boolean mask of valid values
+    '''
+    return _validate_column(values, PATTERNS["snils"], {11: _snils_check})
+
+
+def validate_inn(values: pd.Series) -> np.ndarray:
+    '''
+    Validates 12-digit INN of individuals, which ends with two control digits.
+    :param values: Column of INN values
+    :return: Boolean mask of valid values
+    '''
+    return _validate_column(values, PATTERNS["inn"], {12: _inn_check})
+
+
+def validate_isbn(values: pd.Series) -> np.ndarray:
+    '''
+    Validates hyphenated ISBN-10 (mod 11, check digit may be "X") and ISBN-13 (mod 10).
+    :param values: Column of ISBN values
+    :return: Boolean mask of valid values
+    '''
+    return _validate_column(values, PATTERNS["isbn"], {10: _isbn10_check, 13: _isbn13_check})
+
+
+def validate_issn(values: pd.Series) -> np.ndarray:
+    '''
+    Validates ISSN: 7 digits followed by a mod 11 check digit, which may be "X".
+    :param values: Column of ISSN values
+    :return: Boolean mask of valid values
+    '''
+    return _validate_column(values, PATTERNS["issn"], {8: _issn_check})
+
+
+def _char_digits(value: str) -> List[int]:
+    return [10 if char == "X" else int(char) for char in value.replace("-", "")]
+
+
+def snils_is_valid_row(value: str) -> bool:
+    '''
+    Per-row counterpart of validate_snils.
+    :param value: SNILS value
+    :return: True if the value is valid
+    '''
+    if re.fullmatch(PATTERNS["snils"], value) is None:
+        return False
+    digits = _char_digits(value)
+    if int(value[:9]) <= _SNILS_UNCHECKED_MAX:
+        return True
+    total = sum(digit * weight for digit, weight in zip(digits[:9], range(9, 0, -1)))
+    return total % 101 % 100 == int(value[9:])
+
+
+def inn_is_valid_row(value: str) -> bool:
+    '''
+    Per-row counterpart of validate_inn.
+    :param value: INN value
+    :return: True if the value is valid
+    '''
+    if re.fullmatch(PATTERNS["inn"], value) is None:
+        return False
+    digits = _char_digits(value)
+    first = sum(d * w for d, w in zip(digits, _INN_WEIGHTS_11.tolist())) % 11 % 10
+    second = sum(d * w for d, w in zip(digits, _INN_WEIGHTS_12.tolist())) % 11 % 10
+    return first == digits[10] and second == digits[11]
+
+
+def isbn_is_valid_row(value: str) -> bool:
+    '''
+    Per-row counterpart of validate_isbn.
+    :param value: ISBN value
+    :return: True if the value is valid
+    '''
+    if re.fullmatch(PATTERNS["isbn"], value) is None:
+        return False
+    digits = _char_digits(value)
+    if len(digits) == 13:
+        if digits[-1] == 10:
+            return False
+        return sum(d * w for d, w in zip(digits, _ISBN13_WEIGHTS.tolist())) % 10 == 0
+    return sum(d * w for d, w in zip(digits, range(10, 0, -1))) % 11 == 0
+
+
+def issn_is_valid_row(value: str) -> bool:
+    '''
+    Per-row counterpart of validate_issn.
+    :param value: ISSN value
+    :return: True if the value is valid
+    '''
+    if re.fullmatch(PATTERNS["issn"], value) is None:
+        return False
+    digits = _char_digits(value)
+    return sum(d * w for d, w in zip(digits, range(8, 0, -1))) % 11 == 0
+
+
+CONTROL_DIGIT_VALIDATORS: Dict[str, ColumnValidator] = {
+    "snils": validate_snils,
+    "inn": validate_inn,
+    "isbn": validate_isbn,
+    "issn": validate_issn,
+}
+
+ROW_VALIDATORS: Dict[str, RowValidator] = {
+    "snils": snils_is_valid_row,
+    "inn": inn_is_valid_row,
+    "isbn": isbn_is_valid_row,
+    "issn": issn_is_valid_row,
+}
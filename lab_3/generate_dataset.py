@@ -0,0 +1,332 @@
+import argparse
+import csv
+import json
+import os
+from functools import reduce
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from checksum import calculate_checksum
+from patterns import CSV_ENCODING, CSV_SEPARATOR, PATTERNS
+
+"""
+Offline generator of lab-like csv-files of arbitrary size.
+
+Valid values follow the formats from the lab README and carry correct control digits, so every
+validator implementation must agree on them. A seeded fraction of values in every column is
+corrupted so that it breaks the field format. Next to the csv-file the generator writes
+<name>_invalid_rows.npy with the numbers of invalid rows and <name>_expected.json with their
+count and the checksum from calculate_checksum.
+Control digits are computed here independently from control_digits.py, so the generated data
+can be used to check the validators.
+"""
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+ValueGenerator = Callable[[np.random.Generator, int], np.ndarray]
+
+_LOWER = "abcdefghijklmnopqrstuvwxyz"
+_HEX = "0123456789abcdef"
+_DOMAINS = ["@gmail.com", "@mail.ru", "@protonmail.com", "@sub.domain.ru", "@yandex.ru"]
+_STATUSES = [
+    "200 OK", "201 Created", "204 No Content", "226 IM Used", "301 Moved Permanently",
+    "400 Bad Request", "403 Forbidden", "404 Not Found", "500 Internal Server Error",
+]
+_OCCUPATIONS = [
+    "Web-программист", "Слесарь-механик", "Ассистент менеджера по продажам",
+    "Инженер", "Data Scientist", "Бухгалтер", "Врач-терапевт",
+]
+_LOCALES = ["ru", "en", "xh", "en-us", "es-uy", "de-de", "fr-ca", "pt-br", "zh-cn"]
+_CORRUPTIONS = ["!", " ", "", "N/A"]
+
+_SNILS_WEIGHTS = np.arange(9, 0, -1)
+_INN_WEIGHTS_11 = np.array([7, 2, 4, 10, 3, 5, 9, 4, 6, 8])
+_INN_WEIGHTS_12 = np.array([3, 7, 2, 4, 10, 3, 5, 9, 4, 6, 8])
+_ISBN13_WEIGHTS = np.array([1, 3] * 6)
+_ISSN_WEIGHTS = np.arange(8, 1, -1)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    '''
+    Creates argument parser for command line interface.
+    :return: Argument parser
+    '''
+    parser = argparse.ArgumentParser(description="Generates a lab-like csv-file with known invalid rows")
+    parser.add_argument("csv_path", type=str, help="Path to the csv-file to create")
+    parser.add_argument("-n", "--rows", type=int, default=10_000, help="Number of data rows")
+    parser.add_argument(
+        "-f", "--fields",
+        nargs="+",
+        default=list(PATTERNS),
+        choices=list(PATTERNS),
+        help="Columns of the file",
+    )
+    parser.add_argument(
+        "-i", "--invalid-fraction",
+        type=float,
+        default=0.01,
+        help="Fraction of invalid values in every column",
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows generated at once")
+    return parser
+
+
+def concat(*parts: np.ndarray) -> np.ndarray:
+    '''
+    Concatenates string arrays (or plain strings) element-wise.
+    :param parts: Arrays of equal length or strings
+    :return: Array of concatenated strings
+    '''
+    return reduce(np.char.add, parts)
+
+
+def random_chars(rng: np.random.Generator, rows: int, length: int, alphabet: str) -> np.ndarray:
+    '''
+    Generates strings of random characters from the alphabet.
+    :param rng: Random generator
+    :param rows: Number of strings
+    :param length: Length of every string
+    :param alphabet: Characters to choose from
+    :return: Array of strings
+    '''
+    codes = np.array([ord(char) for char in alphabet], dtype=np.uint32)
+    chars = codes[rng.integers(0, len(codes), size=(rows, length))]
+    return chars.view(f"<U{length}").ravel()
+
+
+def format_digits(digits: np.ndarray, layout: str) -> np.ndarray:
+    '''
+    Places rows of a digit matrix into the "#" slots of the layout, 10 is written as "X".
+    :param digits: Integer matrix with one row of digits per value
+    :param layout: Value layout, e.g. "####-####"
+    :return: Array of strings
+    '''
+    slots = [i for i, char in enumerate(layout) if char == "#"]
+    chars = np.tile(np.array([ord(char) for char in layout], dtype=np.uint32), (len(digits), 1))
+    chars[:, slots] = np.where(digits == 10, ord("X"), digits + ord("0"))
+    return chars.view(f"<U{len(layout)}").ravel()
+
+
+def number_digits(numbers: np.ndarray, width: int) -> np.ndarray:
+    '''
+    Splits non-negative integers into zero-padded digit matrices.
+    :param numbers: Integers to split
+    :param width: Number of digits per integer
+    :return: Integer matrix of shape (len(numbers), width)
+    '''
+    return numbers[:, None] // 10 ** np.arange(width - 1, -1, -1) % 10
+
+
+def _choice(values: List[str]) -> ValueGenerator:
+    return lambda rng, rows: np.array(values)[rng.integers(0, len(values), size=rows)]
+
+
+def _layout(layout: str) -> ValueGenerator:
+    return lambda rng, rows: format_digits(rng.integers(0, 10, size=(rows, layout.count("#"))), layout)
+
+
+def _email(rng: np.random.Generator, rows: int) -> np.ndarray:
+    return concat(random_chars(rng, rows, 8, _LOWER), ".", random_chars(rng, rows, 4, "0123456789"),
+                  _choice(_DOMAINS)(rng, rows))
+
+
+def _height(rng: np.random.Generator, rows: int) -> np.ndarray:
+    return np.char.mod("%.2f", rng.uniform(0.5, 2.2, size=rows))
+
+
+def _snils(rng: np.random.Generator, rows: int) -> np.ndarray:
+    digits = rng.integers(0, 10, size=(rows, 9))
+    digits[:, 0] = rng.integers(1, 10, size=rows)
+    control = digits @ _SNILS_WEIGHTS % 101 % 100
+    return format_digits(np.hstack([digits, number_digits(control, 2)]), "#" * 11)
+
+
+def _inn(rng: np.random.Generator, rows: int) -> np.ndarray:
+    digits = rng.integers(0, 10, size=(rows, 10))
+    digits[:, 0] = rng.integers(1, 10, size=rows)
+    digits = np.hstack([digits, (digits @ _INN_WEIGHTS_11 % 11 % 10)[:, None]])
+    digits = np.hstack([digits, (digits @ _INN_WEIGHTS_12 % 11 % 10)[:, None]])
+    return format_digits(digits, "#" * 12)
+
+
+def _ip_v4(rng: np.random.Generator, rows: int) -> np.ndarray:
+    octets = rng.integers(0, 256, size=(rows, 4)).astype(str)
+    return concat(octets[:, 0], ".", octets[:, 1], ".", octets[:, 2], ".", octets[:, 3])
+
+
+def _coordinate(limit: float) -> ValueGenerator:
+    return lambda rng, rows: np.char.mod("%.6f", rng.uniform(-limit, limit, size=rows))
+
+
+def _blood_type(rng: np.random.Generator, rows: int) -> np.ndarray:
+    return concat(_choice(["A", "B", "AB", "O"])(rng, rows), _choice(["+", "−"])(rng, rows))
+
+
+def _isbn(rng: np.random.Generator, rows: int) -> np.ndarray:
+    digits = np.hstack([np.tile([9, 7, 8], (rows, 1)), rng.integers(0, 10, size=(rows, 9))])
+    control = (10 - digits @ _ISBN13_WEIGHTS % 10) % 10
+    return format_digits(np.hstack([digits, control[:, None]]), "###-#-#####-###-#")
+
+
+def _issn(rng: np.random.Generator, rows: int) -> np.ndarray:
+    digits = rng.integers(0, 10, size=(rows, 7))
+    control = (11 - digits @ _ISSN_WEIGHTS % 11) % 11
+    return format_digits(np.hstack([digits, control[:, None]]), "####-####")
+
+
+def _uuid(rng: np.random.Generator, rows: int) -> np.ndarray:
+    parts = [random_chars(rng, rows, length, _HEX) for length in (8, 4, 4, 4, 12)]
+    return concat(parts[0], "-", parts[1], "-", parts[2], "-", parts[3], "-", parts[4])
+
+
+def _time(rng: np.random.Generator, rows: int) -> np.ndarray:
+    digits = np.hstack([
+        number_digits(rng.integers(0, 24, size=rows), 2),
+        number_digits(rng.integers(0, 60, size=rows), 2),
+        number_digits(rng.integers(0, 60, size=rows), 2),
+        number_digits(rng.integers(0, 1_000_000, size=rows), 6),
+    ])
+    return format_digits(digits, "##:##:##.######")
+
+
+def _date(rng: np.random.Generator, rows: int) -> np.ndarray:
+    digits = np.hstack([
+        number_digits(rng.integers(1950, 2026, size=rows), 4),
+        number_digits(rng.integers(1, 13, size=rows), 2),
+        number_digits(rng.integers(1, 29, size=rows), 2),
+    ])
+    return format_digits(digits, "####-##-##")
+
+
+GENERATORS: Dict[str, ValueGenerator] = {
+    "email": _email,
+    "telephone": _layout("+7-(###)-###-##-##"),
+    "http_status_message": _choice(_STATUSES),
+    "height": _height,
+    "snils": _snils,
+    "inn": _inn,
+    "passport": _layout("## ## ######"),
+    "identifier": _layout("##-##/##"),
+    "ip_v4": _ip_v4,
+    "occupation": _choice(_OCCUPATIONS),
+    "longitude": _coordinate(180),
+    "latitude": _coordinate(90),
+    "hex_color": lambda rng, rows: concat("#", random_chars(rng, rows, 6, _HEX)),
+    "blood_type": _blood_type,
+    "isbn": _isbn,
+    "issn": _issn,
+    "locale_code": _choice(_LOCALES),
+    "uuid": _uuid,
+    "time": _time,
+    "date": _date,
+}
+
+
+def corrupt(rng: np.random.Generator, values: np.ndarray) -> np.ndarray:
+    '''
+    Breaks the format of values: appends "!", prepends a space or replaces the value with "" or "N/A".
+    None of the field patterns accepts the result.
+    :param rng: Random generator
+    :param values: Valid values
+    :return: Invalid values
+    '''
+    values = values.astype(object)
+    kinds = rng.integers(0, len(_CORRUPTIONS), size=len(values))
+    corrupted = np.empty(len(values), dtype=object)
+    corrupted[kinds == 0] = values[kinds == 0] + _CORRUPTIONS[0]
+    corrupted[kinds == 1] = _CORRUPTIONS[1] + values[kinds == 1]
+    corrupted[kinds == 2] = _CORRUPTIONS[2]
+    corrupted[kinds == 3] = _CORRUPTIONS[3]
+    return corrupted
+
+
+def generate_chunk(
+        rng: np.random.Generator,
+        rows: int,
+        fields: List[str],
+        invalid_fraction: float,
+) -> tuple:
+    '''
+    Generates a chunk of rows with a fraction of corrupted values in every column.
+    :param rng: Random generator
+    :param rows: Number of rows
+    :param fields: Columns of the chunk
+    :param invalid_fraction: Fraction of invalid values in every column
+    :return: DataFrame with the chunk and boolean mask of its invalid rows
+    '''
+    columns = {}
+    invalid = np.zeros(rows, dtype=bool)
+    for field in fields:
+        values = GENERATORS[field](rng, rows).astype(object)
+        broken = rng.random(rows) < invalid_fraction
+        values[broken] = corrupt(rng, values[broken])
+        columns[field] = values
+        invalid |= broken
+    return pd.DataFrame(columns), invalid
+
+
+def expected_paths(csv_path: str) -> tuple:
+    '''
+    Builds paths of the files with expected results that lie next to the csv-file.
+    :param csv_path: Path to the csv-file
+    :return: Paths of the json-file with the checksum and the npy-file with invalid rows
+    '''
+    stem = os.path.splitext(csv_path)[0]
+    return f"{stem}_expected.json", f"{stem}_invalid_rows.npy"
+
+
+def generate_dataset(
+        csv_path: str,
+        rows: int,
+        fields: List[str],
+        invalid_fraction: float,
+        seed: int,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> str:
+    '''
+    Writes the csv-file chunk by chunk and the expected results next to it.
+    :param csv_path: Path to the csv-file to create
+    :param rows: Number of data rows
+    :param fields: Columns of the file
+    :param invalid_fraction: Fraction of invalid values in every column
+    :param seed: Random seed
+    :param chunk_size: Rows generated at once
+    :return: Checksum of the invalid rows
+    '''
+    if not 0 <= invalid_fraction <= 1:
+        raise ValueError("Invalid fraction must be between 0 and 1")
+    rng = np.random.default_rng(seed)
+    invalid_rows = []
+    os.makedirs(os.path.dirname(os.path.abspath(csv_path)), exist_ok=True)
+    with open(csv_path, "w", encoding=CSV_ENCODING, newline="") as f:
+        for start in range(0, max(rows, 1), chunk_size):
+            chunk, invalid = generate_chunk(rng, min(chunk_size, rows - start), fields, invalid_fraction)
+            chunk.to_csv(f, sep=CSV_SEPARATOR, index=False, header=start == 0, quoting=csv.QUOTE_ALL)
+            invalid_rows.append(np.flatnonzero(invalid) + start)
+    invalid_rows = np.concatenate(invalid_rows)
+    checksum = calculate_checksum(invalid_rows.tolist())
+    json_path, npy_path = expected_paths(csv_path)
+    np.save(npy_path, invalid_rows)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"rows": rows, "invalid_rows": len(invalid_rows), "checksum": checksum}, f, indent=2)
+    return checksum
+
+
+def main() -> None:
+    '''
+    Generates the dataset from command line arguments.
+    '''
+    try:
+        args = create_parser().parse_args()
+        checksum = generate_dataset(args.csv_path, args.rows, args.fields, args.invalid_fraction,
+                                    args.seed, args.chunk_size)
+        print(f"Generated {args.rows} rows, checksum: {checksum}")
+    except (ValueError, OSError) as exc:
+        print(exc)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,424 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from checksum import calculate_checksum, serialize_result
+from patterns import CSV_SEPARATOR
+from validator import find_invalid_rows
+
+"""
+Incremental revalidation of an append-only lab csv-file.
+
+A checkpoint next to the csv-file records how many bytes and rows are already validated, and
+the numbers of invalid rows found so far are kept in a binary file of int64 values. The next run
+validates only the rows appended after the recorded offset and updates both files, so the
+work is proportional to the appended data.
+
+By default the check that the validated prefix is intact is bounded and does not depend on the
+file size: the checkpoint stores the inode, size and modification time of the file and a hash of
+SAMPLE_BLOCKS blocks spread evenly over the prefix, the last of them ending at the offset.
+The whole file is validated again if the file was replaced, became shorter than the prefix or a
+sampled block changed. The sampled blocks are not read when size and modification time are
+the same as in the checkpoint. An in-place edit of the prefix that misses the sampled blocks is NOT
+detected in this mode. With verify_prefix (--verify-prefix) the SHA-256 of the whole prefix is
+compared instead, which detects any edit at the cost of reading the prefix on every run.
+The hash of the whole prefix is kept only by runs that read all of it: full validations and
+verify_prefix runs.
+
+The checkpoint covers complete lines only. A last row without a line break is validated and
+included in the result on every run, but stays outside the checkpoint until its line is complete.
+If such a row can not be parsed, e.g. it ends inside a quoted value, it is considered still being
+written: it is left out of the result and reported.
+Values are expected not to contain line breaks, which holds for the lab data.
+The checksum itself is computed over all invalid rows, as md5 state can not be saved between runs.
+"""
+
+SCAN_SIZE = 64 * 1024
+SAMPLE_BLOCKS = 16
+SAMPLE_SIZE = 4 * 1024
+BLOCK_SIZE = 64 * 1024 * 1024
+
+CHECKPOINT_KEYS = (
+    "offset", "rows", "invalid_rows", "columns", "control_digits",
+    "inode", "size", "mtime_ns", "sample_hash", "prefix_hash",
+)
+
+_BOMS = [
+    (b"\xff\xfe", "utf-16-le", b"\n\x00"),
+    (b"\xfe\xff", "utf-16-be", b"\x00\n"),
+    (b"\xef\xbb\xbf", "utf-8", b"\n"),
+]
+
+
+def create_parser() -> argparse.ArgumentParser:
+    '''
+    Creates argument parser for command line interface.
+    :return: Argument parser
+    '''
+    parser = argparse.ArgumentParser(description="Validates rows appended since the last run")
+    parser.add_argument("csv_path", type=str, help="Path to csv-file with data")
+    parser.add_argument("variant", type=int, help="Variant number")
+    parser.add_argument(
+        "-c", "--control-digits",
+        action="store_true",
+        help="Also verify control digits of snils, inn, isbn and issn",
+    )
+    parser.add_argument("--full", action="store_true", help="Ignore the checkpoint and validate the whole file")
+    parser.add_argument(
+        "--verify-prefix",
+        action="store_true",
+        help="Hash the whole validated part of the file to detect any edit, reads the whole file",
+    )
+    return parser
+
+
+def checkpoint_paths(csv_path: str) -> Tuple[str, str]:
+    '''
+    Builds paths of the checkpoint files that lie next to the csv-file.
+    :param csv_path: Path to the csv-file
+    :return: Paths of the json-file with the checkpoint and the file with invalid row numbers
+    '''
+    stem = os.path.splitext(csv_path)[0]
+    return f"{stem}_checkpoint.json", f"{stem}_checkpoint_rows.bin"
+
+
+def detect_encoding(head: bytes) -> Tuple[str, bytes, int]:
+    '''
+    Detects the encoding of the file by its byte order mark, utf-8 is assumed without one.
+    :param head: First bytes of the file
+    :return: Codec name without BOM handling, line break bytes and length of the BOM
+    '''
+    for bom, codec, newline in _BOMS:
+        if head.startswith(bom):
+            return codec, newline, len(bom)
+    return "utf-8", b"\n", 0
+
+
+def _line_end(data: bytes, newline: bytes, start: int = 0) -> int:
+    '''
+    Finds the position right after the first line break in data, aligned to the code unit size.
+    :param data: Encoded text
+    :param newline: Encoded line break
+    :param start: Position to search from
+    :return: Position after the line break or -1 if there is none
+    '''
+    index = data.find(newline, start)
+    while index != -1 and (index - start) % len(newline):
+        index = data.find(newline, index + 1)
+    return -1 if index == -1 else index + len(newline)
+
+
+def _last_line_end(data: bytes, newline: bytes) -> int:
+    '''
+    Finds the position right after the last line break in data, aligned to the code unit size.
+    :param data: Encoded text that starts at a character boundary
+    :param newline: Encoded line break
+    :return: Position after the line break or 0 if there is none
+    '''
+    index = data.rfind(newline)
+    while index != -1 and index % len(newline):
+        index = data.rfind(newline, 0, index)
+    return 0 if index == -1 else index + len(newline)
+
+
+def hash_range(f: io.BufferedReader, start: int, end: int, prefix_hash: Any) -> None:
+    '''
+    Feeds bytes of the file between start and end to the hash by blocks.
+    :param f: File opened in binary mode
+    :param start: Offset of the first byte
+    :param end: Offset right after the last byte
+    :param prefix_hash: Hash object to update
+    '''
+    f.seek(start)
+    while start < end:
+        data = f.read(min(BLOCK_SIZE, end - start))
+        if not data:
+            break
+        prefix_hash.update(data)
+        start += len(data)
+
+
+def sample_hash(f: io.BufferedReader, offset: int) -> str:
+    '''
+    Hashes SAMPLE_BLOCKS blocks spread evenly over the first offset bytes of the file.
+    The first block starts at the beginning of the file and the last one ends at the offset.
+    :param f: File opened in binary mode
+    :param offset: Length of the validated prefix in bytes
+    :return: Hash of the sampled blocks
+    '''
+    blocks_hash = hashlib.sha256()
+    starts = np.linspace(0, max(0, offset - SAMPLE_SIZE), SAMPLE_BLOCKS).astype(np.int64)
+    for start in sorted(set(starts.tolist())):
+        f.seek(start)
+        blocks_hash.update(f.read(min(SAMPLE_SIZE, offset - start)))
+    return blocks_hash.hexdigest()
+
+
+def load_checkpoint(csv_path: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    '''
+    Loads the checkpoint of the csv-file.
+    :param csv_path: Path to the csv-file
+    :return: Checkpoint or None, and the reason why an existing checkpoint can not be used
+    '''
+    json_path, _ = checkpoint_paths(csv_path)
+    if not os.path.isfile(json_path):
+        return None, None
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return None, "the checkpoint is unreadable"
+    if not isinstance(checkpoint, dict) or any(key not in checkpoint for key in CHECKPOINT_KEYS):
+        return None, "the checkpoint is incomplete"
+    return checkpoint, None
+
+
+def save_checkpoint(csv_path: str, checkpoint: Dict[str, Any]) -> None:
+    '''
+    Saves the checkpoint atomically, so an interrupted run leaves the previous one intact.
+    :param csv_path: Path to the csv-file
+    :param checkpoint: Checkpoint to save
+    '''
+    json_path, _ = checkpoint_paths(csv_path)
+    with open(f"{json_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(f"{json_path}.tmp", json_path)
+
+
+def load_invalid_rows(csv_path: str, count: int) -> np.ndarray:
+    '''
+    Loads invalid row numbers recorded by the checkpoint and drops rows left by an interrupted run.
+    :param csv_path: Path to the csv-file
+    :param count: Number of invalid rows recorded in the checkpoint
+    :return: Invalid row numbers
+    '''
+    _, rows_path = checkpoint_paths(csv_path)
+    if count == 0:
+        open(rows_path, "wb").close()
+        return np.empty(0, dtype=np.int64)
+    with open(rows_path, "r+b") as f:
+        f.truncate(count * np.dtype(np.int64).itemsize)
+    return np.fromfile(rows_path, dtype=np.int64)
+
+
+def append_invalid_rows(csv_path: str, rows: List[int]) -> None:
+    '''
+    Appends invalid row numbers to the file of the checkpoint.
+    :param csv_path: Path to the csv-file
+    :param rows: Row numbers to append
+    '''
+    _, rows_path = checkpoint_paths(csv_path)
+    with open(rows_path, "ab") as f:
+        np.asarray(rows, dtype=np.int64).tofile(f)
+
+
+def checkpoint_mismatch(
+        f: io.BufferedReader,
+        csv_path: str,
+        columns: List[str],
+        control_digits: bool,
+        checkpoint: Dict[str, Any],
+        prefix_hash: Optional[Any] = None,
+) -> Optional[str]:
+    '''
+    Checks that the checkpoint still describes the file.
+    Without prefix_hash only a bounded number of bytes is read, see the module docstring.
+    :param f: File opened in binary mode
+    :param csv_path: Path to the csv-file
+    :param columns: Current column names of the file
+    :param control_digits: Whether control digits are verified in this run
+    :param checkpoint: Checkpoint of the previous run
+    :param prefix_hash: Empty hash object to verify the whole validated prefix with, it receives the prefix
+    :return: Reason why the whole file has to be validated again or None if the checkpoint is usable
+    '''
+    if checkpoint["columns"] != columns:
+        return "the columns have changed"
+    if checkpoint["control_digits"] != control_digits:
+        return "the control digit setting has changed"
+    _, rows_path = checkpoint_paths(csv_path)
+    rows_size = os.path.getsize(rows_path) if os.path.isfile(rows_path) else 0
+    if rows_size < checkpoint["invalid_rows"] * np.dtype(np.int64).itemsize:
+        return "the file with invalid rows is incomplete"
+    stat = os.fstat(f.fileno())
+    if stat.st_ino != checkpoint["inode"]:
+        return "the file has been replaced"
+    if stat.st_size < checkpoint["offset"]:
+        return "the file is shorter than its validated part"
+    if prefix_hash is not None:
+        if checkpoint["prefix_hash"] is None:
+            return "the checkpoint has no hash of the whole validated part"
+        hash_range(f, 0, checkpoint["offset"], prefix_hash)
+        if prefix_hash.hexdigest() != checkpoint["prefix_hash"]:
+            return "the validated part of the file has changed"
+        return None
+    if stat.st_size == checkpoint["size"] and stat.st_mtime_ns == checkpoint["mtime_ns"]:
+        return None
+    if sample_hash(f, checkpoint["offset"]) != checkpoint["sample_hash"]:
+        return "a sampled block of the validated part has changed"
+    return None
+
+
+def _read_header(f: io.BufferedReader) -> Tuple[List[str], str, bytes, int]:
+    '''
+    Reads the column names from the first line of the file.
+    :param f: File opened in binary mode
+    :return: Column names, codec, line break bytes and offset of the first data row
+    '''
+    f.seek(0)
+    head = f.read(SCAN_SIZE)
+    codec, newline, bom_size = detect_encoding(head)
+    header_end = _line_end(head, newline, bom_size)
+    if header_end == -1:
+        raise ValueError("The header of the csv-file is incomplete")
+    header = pd.read_csv(io.StringIO(head[bom_size:header_end].decode(codec)), sep=CSV_SEPARATOR, nrows=0)
+    return list(header.columns), codec, newline, header_end
+
+
+def _data_end(f: io.BufferedReader, start: int, size: int, newline: bytes) -> int:
+    '''
+    Finds the end of the last complete line of the file by reading it backwards from the end.
+    :param f: File opened in binary mode
+    :param start: Offset of the first line to consider, aligned to the code unit size
+    :param size: Size of the file in bytes
+    :param newline: Encoded line break
+    :return: Offset right after the last line break or start if there is none
+    '''
+    end = size
+    while end > start:
+        block_start = max(start, end - SCAN_SIZE)
+        block_start -= (block_start - start) % len(newline)
+        f.seek(block_start)
+        line_end = _last_line_end(f.read(end - block_start), newline)
+        if line_end:
+            return block_start + line_end
+        end = block_start
+    return start
+
+
+def _read_blocks(f: io.BufferedReader, start: int, end: int, newline: bytes) -> Iterator[bytes]:
+    '''
+    Reads complete lines between start and end by blocks of about BLOCK_SIZE bytes.
+    :param f: File opened in binary mode
+    :param start: Offset of the first line
+    :param end: Offset right after the last line break
+    :param newline: Encoded line break
+    :return: Iterator over blocks of complete lines
+    '''
+    f.seek(start)
+    rest = b""
+    while start < end:
+        data = rest + f.read(min(BLOCK_SIZE, end - start))
+        start += len(data) - len(rest)
+        cut = len(data) if start >= end else _last_line_end(data, newline)
+        rest = data[cut:]
+        if cut:
+            yield data[:cut]
+
+
+def _validate_text(text: str, columns: List[str], first_row: int, control_digits: bool) -> Tuple[List[int], int]:
+    '''
+    Validates rows of decoded csv text without a header.
+    :param text: Decoded rows
+    :param columns: Column names
+    :param first_row: Number of the first row in the file
+    :param control_digits: Also verify control digits of the fields that have them
+    :return: Numbers of invalid rows and the number of rows in the text
+    '''
+    df = pd.read_csv(io.StringIO(text), sep=CSV_SEPARATOR, header=None, names=columns,
+                     dtype=str, keep_default_na=False)
+    return [row + first_row for row in find_invalid_rows(df, control_digits)], len(df)
+
+
+def revalidate(
+        csv_path: str,
+        control_digits: bool = False,
+        full: bool = False,
+        verify_prefix: bool = False,
+) -> Tuple[List[int], int, Optional[str], bool]:
+    '''
+    Validates rows appended since the last run and updates the checkpoint.
+    :param csv_path: Path to the csv-file
+    :param control_digits: Also verify control digits of the fields that have them
+    :param full: Ignore the checkpoint and validate the whole file
+    :param verify_prefix: Compare the hash of the whole validated prefix instead of sampled blocks
+    :return: Sorted numbers of all invalid rows, the number of rows validated in this run,
+        the reason why an existing checkpoint was discarded (None if it was used or absent) and
+        whether an unterminated last row could not be parsed and was left out
+    '''
+    if not os.path.isfile(csv_path):
+        raise FileNotFoundError(f"File {csv_path} not found.")
+    checkpoint, reason = (None, None) if full else load_checkpoint(csv_path)
+    with open(csv_path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        columns, codec, newline, data_start = _read_header(f)
+        prefix_hash = hashlib.sha256() if verify_prefix else None
+        if checkpoint is not None:
+            reason = checkpoint_mismatch(f, csv_path, columns, control_digits, checkpoint, prefix_hash)
+            if reason is not None:
+                checkpoint = None
+        if checkpoint is None:
+            checkpoint = {"offset": data_start, "rows": 0, "invalid_rows": 0,
+                          "columns": columns, "control_digits": control_digits}
+            prefix_hash = hashlib.sha256()
+            hash_range(f, 0, data_start, prefix_hash)
+        invalid_rows = load_invalid_rows(csv_path, checkpoint["invalid_rows"])
+        end = _data_end(f, checkpoint["offset"], stat.st_size, newline)
+        new_rows = 0
+        for block in _read_blocks(f, checkpoint["offset"], end, newline):
+            if prefix_hash is not None:
+                prefix_hash.update(block)
+            block_invalid, block_rows = _validate_text(block.decode(codec), columns,
+                                                       checkpoint["rows"] + new_rows, control_digits)
+            append_invalid_rows(csv_path, block_invalid)
+            invalid_rows = np.concatenate([invalid_rows, np.asarray(block_invalid, dtype=np.int64)])
+            new_rows += block_rows
+        checkpoint.update({
+            "offset": end,
+            "rows": checkpoint["rows"] + new_rows,
+            "invalid_rows": len(invalid_rows),
+            "inode": stat.st_ino,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sample_hash": sample_hash(f, end),
+            "prefix_hash": None if prefix_hash is None else prefix_hash.hexdigest(),
+        })
+        f.seek(end)
+        tail = f.read(stat.st_size - end)
+    save_checkpoint(csv_path, checkpoint)
+    tail = tail[:len(tail) - len(tail) % len(newline)].decode(codec, errors="replace")
+    if not tail.strip():
+        return invalid_rows.tolist(), new_rows, reason, False
+    try:
+        tail_invalid, tail_rows = _validate_text(tail, columns, checkpoint["rows"], control_digits)
+    except pd.errors.ParserError:
+        return invalid_rows.tolist(), new_rows, reason, True
+    return invalid_rows.tolist() + tail_invalid, new_rows + tail_rows, reason, False
+
+
+def main() -> None:
+    '''
+    Revalidates the csv-file, prints the checksum and writes it to result.json.
+    '''
+    try:
+        args = create_parser().parse_args()
+        invalid_rows, new_rows, reason, incomplete = revalidate(args.csv_path, args.control_digits, args.full,
+                                                                args.verify_prefix)
+        if reason is not None:
+            print(f"The checkpoint does not match the file: {reason}, validated the whole file")
+        if incomplete:
+            print("The last row is still being written and was not validated")
+        checksum = calculate_checksum(invalid_rows)
+        print(f"Validated rows: {new_rows}, invalid rows: {len(invalid_rows)}, checksum: {checksum}")
+        serialize_result(args.variant, checksum)
+    except (FileNotFoundError, ValueError, OSError) as exc:
+        print(exc)
+
+
+if __name__ == '__main__':
+    main()
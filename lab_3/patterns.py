@@ -0,0 +1,33 @@
+from typing import Dict
+
+"""
+Regular expressions used to shape-check every field type described in the lab README.
+"""
+
+CSV_SEPARATOR = ";"
+CSV_ENCODING = "utf-16"
+
+_IP_OCTET = r"(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])"
+
+PATTERNS: Dict[str, str] = {
+    "email": r"^[a-z0-9]+(?:[._][a-z0-9]+)*@[a-z0-9]+(?:\.[a-z0-9]+)*\.[a-z]{2,}$",
+    "telephone": r"^\+7-\([0-9]{3}\)-[0-9]{3}-[0-9]{2}-[0-9]{2}$",
+    "http_status_message": r"^[1-5][0-9]{2} [A-Za-z][\w\-' ]*$",
+    "height": r"^[0-2]\.[0-9]{2}$",
+    "snils": r"^[0-9]{11}$",
+    "inn": r"^[0-9]{12}$",
+    "passport": r"^[0-9]{2} [0-9]{2} [0-9]{6}$",
+    "identifier": r"^[0-9]{2}-[0-9]{2}/[0-9]{2}$",
+    "ip_v4": rf"^{_IP_OCTET}(?:\.{_IP_OCTET}){{3}}$",
+    "occupation": r"^[A-Za-zА-Яа-яЁё]+(?:[ -][A-Za-zА-Яа-яЁё]+)*$",
+    "longitude": r"^-?(?:180(?:\.0+)?|(?:1[0-7][0-9]|[0-9]{1,2})(?:\.[0-9]+)?)$",
+    "latitude": r"^-?(?:90(?:\.0+)?|[1-8]?[0-9](?:\.[0-9]+)?)$",
+    "hex_color": r"^#[0-9a-f]{6}$",
+    "blood_type": "^(?:AB|A|B|O)[+−]$",
+    "isbn": r"^(?:[0-9]{3}-)?[0-9]-[0-9]{5}-[0-9]{3}-[0-9X]$",
+    "issn": r"^[0-9]{4}-[0-9]{3}[0-9X]$",
+    "locale_code": r"^[a-z]{2,3}(?:-[a-z]{2,4})?$",
+    "uuid": r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$",
+    "time": r"^(?:[01][0-9]|2[0-3]):[0-5][0-9]:[0-5][0-9]\.[0-9]{6}$",
+    "date": r"^[0-9]{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12][0-9]|3[01])$",
+}
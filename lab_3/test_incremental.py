@@ -0,0 +1,217 @@
+import os
+from typing import List
+
+import numpy as np
+import pytest
+
+import incremental
+from checksum import calculate_checksum
+from generate_dataset import generate_dataset
+from incremental import checkpoint_paths, revalidate
+from validator import validate_csv
+
+FIELDS = ["email", "inn", "isbn", "blood_type"]
+NEWLINE = "\n".encode("utf-16-le")
+BOM_SIZE = 2
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(incremental, "BLOCK_SIZE", 4096)
+    monkeypatch.setattr(incremental, "SCAN_SIZE", 1024)
+    monkeypatch.setattr(incremental, "SAMPLE_SIZE", 256)
+
+
+def data_lines(csv_path: str) -> List[bytes]:
+    '''
+    Splits a utf-16 file made by generate_dataset into encoded data lines, without BOM and header.
+    '''
+    with open(csv_path, "rb") as f:
+        data = f.read()[BOM_SIZE:]
+    units = [data[i:i + 2] for i in range(0, len(data), 2)]
+    lines, line = [], b""
+    for unit in units:
+        line += unit
+        if unit == NEWLINE:
+            lines.append(line)
+            line = b""
+    return lines[1:]
+
+
+def expected_checksum(csv_path: str) -> str:
+    return calculate_checksum(validate_csv(csv_path))
+
+
+def read_bytes(csv_path: str) -> bytes:
+    with open(csv_path, "rb") as f:
+        return f.read()
+
+
+def write_bytes(csv_path: str, data: bytes) -> None:
+    with open(csv_path, "wb") as f:
+        f.write(data)
+
+
+def append_bytes(csv_path: str, data: bytes) -> None:
+    with open(csv_path, "ab") as f:
+        f.write(data)
+
+
+def replace_unit(csv_path: str, start: int, stop: int) -> None:
+    '''
+    Overwrites one utf-16 letter or digit between start and stop with "!", keeping the file size,
+    and moves the modification time forward so it differs from the checkpoint.
+    '''
+    data = bytearray(read_bytes(csv_path))
+    position = next(i for i in range(start + start % 2, stop - 1, 2) if data[i:i + 2].decode("utf-16-le").isalnum())
+    data[position:position + 2] = "!".encode("utf-16-le")
+    mtime_ns = os.stat(csv_path).st_mtime_ns
+    write_bytes(csv_path, bytes(data))
+    os.utime(csv_path, ns=(mtime_ns + 10 ** 9, mtime_ns + 10 ** 9))
+
+
+@pytest.fixture
+def csv_path(tmp_path) -> str:
+    path = str(tmp_path / "data.csv")
+    generate_dataset(path, 2000, FIELDS, 0.05, seed=1)
+    return path
+
+
+@pytest.fixture
+def appended_lines(tmp_path) -> List[bytes]:
+    path = str(tmp_path / "appended.csv")
+    generate_dataset(path, 500, FIELDS, 0.05, seed=2)
+    return data_lines(path)
+
+
+def test_first_run_validates_whole_file(csv_path: str) -> None:
+    invalid_rows, new_rows, reason, incomplete = revalidate(csv_path)
+    assert (new_rows, reason, incomplete) == (2000, None, False)
+    assert calculate_checksum(invalid_rows) == expected_checksum(csv_path)
+
+
+def test_rerun_without_changes_validates_nothing(csv_path: str) -> None:
+    first, _, _, _ = revalidate(csv_path)
+    invalid_rows, new_rows, reason, _ = revalidate(csv_path)
+    assert (new_rows, reason) == (0, None)
+    assert invalid_rows == first
+    assert calculate_checksum(invalid_rows) == expected_checksum(csv_path)
+
+
+def test_default_mode_does_not_hash_the_prefix(
+        csv_path: str,
+        appended_lines: List[bytes],
+        monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    revalidate(csv_path)
+    append_bytes(csv_path, b"".join(appended_lines[:100]))
+
+    def fail(*args) -> None:
+        raise AssertionError("the whole prefix must not be read")
+
+    monkeypatch.setattr(incremental, "hash_range", fail)
+    invalid_rows, new_rows, reason, _ = revalidate(csv_path)
+    assert (new_rows, reason) == (100, None)
+    assert calculate_checksum(invalid_rows) == expected_checksum(csv_path)
+
+
+def test_append_with_partial_last_line(csv_path: str, appended_lines: List[bytes], tmp_path) -> None:
+    revalidate(csv_path)
+    original = read_bytes(csv_path)
+    complete = b"".join(appended_lines[:300])
+    partial = appended_lines[300][:4]
+    append_bytes(csv_path, complete + partial)
+    reference = str(tmp_path / "reference.csv")
+    write_bytes(reference, original + complete)
+
+    invalid_rows, new_rows, reason, incomplete = revalidate(csv_path)
+    assert (new_rows, reason, incomplete) == (300, None, True)
+    assert calculate_checksum(invalid_rows) == expected_checksum(reference)
+
+    append_bytes(csv_path, appended_lines[300][len(partial):] + b"".join(appended_lines[301:]))
+    invalid_rows, new_rows, reason, incomplete = revalidate(csv_path)
+    assert (new_rows, reason, incomplete) == (200, None, False)
+    assert calculate_checksum(invalid_rows) == expected_checksum(csv_path)
+
+
+def test_last_row_without_line_break_is_validated(csv_path: str, appended_lines: List[bytes]) -> None:
+    write_bytes(csv_path, read_bytes(csv_path)[:-len(NEWLINE)])
+    invalid_rows, new_rows, _, incomplete = revalidate(csv_path)
+    assert (new_rows, incomplete) == (2000, False)
+    assert calculate_checksum(invalid_rows) == expected_checksum(csv_path)
+
+    invalid_rows, new_rows, reason, _ = revalidate(csv_path)
+    assert (new_rows, reason) == (1, None)
+    assert calculate_checksum(invalid_rows) == expected_checksum(csv_path)
+
+    append_bytes(csv_path, NEWLINE + b"".join(appended_lines[:10]))
+    invalid_rows, new_rows, reason, _ = revalidate(csv_path)
+    assert (new_rows, reason) == (11, None)
+    assert calculate_checksum(invalid_rows) == expected_checksum(csv_path)
+
+
+def test_truncation_triggers_full_rescan(csv_path: str) -> None:
+    revalidate(csv_path)
+    drop = sum(len(line) for line in data_lines(csv_path)[-100:])
+    write_bytes(csv_path, read_bytes(csv_path)[:-drop])
+    invalid_rows, new_rows, reason, _ = revalidate(csv_path)
+    assert reason is not None
+    assert new_rows == 1900
+    assert calculate_checksum(invalid_rows) == expected_checksum(csv_path)
+
+
+def test_edit_of_sampled_block_triggers_full_rescan(csv_path: str) -> None:
+    revalidate(csv_path)
+    offset = incremental.load_checkpoint(csv_path)[0]["offset"]
+    starts = np.linspace(0, offset - incremental.SAMPLE_SIZE, incremental.SAMPLE_BLOCKS).astype(np.int64)
+    middle = int(starts[len(starts) // 2])
+    replace_unit(csv_path, middle, middle + incremental.SAMPLE_SIZE)
+    invalid_rows, new_rows, reason, _ = revalidate(csv_path)
+    assert reason is not None
+    assert new_rows == 2000
+    assert calculate_checksum(invalid_rows) == expected_checksum(csv_path)
+
+
+def test_edit_in_the_middle_triggers_full_rescan(csv_path: str) -> None:
+    revalidate(csv_path)
+    size = os.path.getsize(csv_path)
+    replace_unit(csv_path, size // 3, size)
+    invalid_rows, new_rows, reason, _ = revalidate(csv_path, verify_prefix=True)
+    assert reason is not None
+    assert new_rows == 2000
+    assert calculate_checksum(invalid_rows) == expected_checksum(csv_path)
+
+
+def test_verify_prefix_after_default_run(csv_path: str, appended_lines: List[bytes]) -> None:
+    revalidate(csv_path)
+    append_bytes(csv_path, b"".join(appended_lines[:100]))
+    revalidate(csv_path)
+    invalid_rows, new_rows, reason, _ = revalidate(csv_path, verify_prefix=True)
+    assert reason is not None
+    assert new_rows == 2100
+    invalid_rows, new_rows, reason, _ = revalidate(csv_path, verify_prefix=True)
+    assert (new_rows, reason) == (0, None)
+    assert calculate_checksum(invalid_rows) == expected_checksum(csv_path)
+
+
+@pytest.mark.parametrize("content", ["{not json", "[]", '{"offset": 2}'])
+def test_broken_checkpoint_triggers_full_rescan(csv_path: str, content: str) -> None:
+    revalidate(csv_path)
+    with open(checkpoint_paths(csv_path)[0], "w", encoding="utf-8") as f:
+        f.write(content)
+    invalid_rows, new_rows, reason, _ = revalidate(csv_path)
+    assert reason is not None
+    assert new_rows == 2000
+    assert calculate_checksum(invalid_rows) == expected_checksum(csv_path)
+
+
+def test_rows_left_by_interrupted_run_are_dropped(csv_path: str, appended_lines: List[bytes]) -> None:
+    revalidate(csv_path)
+    _, rows_path = checkpoint_paths(csv_path)
+    with open(rows_path, "ab") as f:
+        np.arange(5000, 5010, dtype=np.int64).tofile(f)
+    append_bytes(csv_path, b"".join(appended_lines[:50]))
+    invalid_rows, new_rows, reason, _ = revalidate(csv_path)
+    assert (new_rows, reason) == (50, None)
+    assert calculate_checksum(invalid_rows) == expected_checksum(csv_path)
+    assert os.path.getsize(rows_path) == len(invalid_rows) * np.dtype(np.int64).itemsize
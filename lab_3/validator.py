@@ -0,0 +1,145 @@
+import argparse
+import os
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from checksum import calculate_checksum, serialize_result
+from control_digits import CONTROL_DIGIT_VALIDATORS, ColumnValidator
+from patterns import CSV_ENCODING, CSV_SEPARATOR, PATTERNS
+
+"""
+Validation of the lab csv-file: every column is checked with the regex of its field type,
+the numbers of invalid rows are collected and turned into a checksum.
+"""
+
+_READ_OPTIONS = {
+    "sep": CSV_SEPARATOR,
+    "encoding": CSV_ENCODING,
+    "dtype": str,
+    "keep_default_na": False,
+}
+
+
+def create_parser() -> argparse.ArgumentParser:
+    '''
+    Creates argument parser for command line interface.
+    :return: Argument parser
+    '''
+    parser = argparse.ArgumentParser(description="Validates the lab csv-file and computes its checksum")
+    parser.add_argument("csv_path", type=str, help="Path to csv-file with data")
+    parser.add_argument("variant", type=int, help="Variant number")
+    parser.add_argument(
+        "-c", "--control-digits",
+        action="store_true",
+        help="Also verify control digits of snils, inn, isbn and issn",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Validate the file by chunks of this many rows to limit memory usage",
+    )
+    return parser
+
+
+def _check_file(csv_path: str) -> None:
+    if not os.path.isfile(csv_path):
+        raise FileNotFoundError(f"File {csv_path} not found.")
+
+
+def read_csv(csv_path: str) -> pd.DataFrame:
+    '''
+    Reads the lab csv-file keeping every value as a string.
+    :param csv_path: Path to csv-file
+    :return: DataFrame with raw values
+    '''
+    _check_file(csv_path)
+    return pd.read_csv(csv_path, **_READ_OPTIONS)
+
+
+def read_csv_chunks(csv_path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    '''
+    Reads the lab csv-file by chunks, keeping every value as a string.
+    :param csv_path: Path to csv-file
+    :param chunk_size: Number of rows in a chunk
+    :return: Iterator over DataFrames with raw values
+    '''
+    _check_file(csv_path)
+    with pd.read_csv(csv_path, chunksize=chunk_size, **_READ_OPTIONS) as reader:
+        yield from reader
+
+
+def column_validators(columns: List[str], control_digits: bool = False) -> Dict[str, ColumnValidator]:
+    '''
+    Selects a column validator for every column of the file.
+    :param columns: Column names, which must be field names from PATTERNS
+    :param control_digits: Use control digit validators for the fields that have them
+    :return: Column validator for every column
+    '''
+    validators = {}
+    for column in columns:
+        if column not in PATTERNS:
+            raise ValueError(f"Unknown field {column}")
+        if control_digits and column in CONTROL_DIGIT_VALIDATORS:
+            validators[column] = CONTROL_DIGIT_VALIDATORS[column]
+        else:
+            validators[column] = _regex_validator(PATTERNS[column])
+    return validators
+
+
+def _regex_validator(pattern: str) -> ColumnValidator:
+    def validate(values: pd.Series) -> np.ndarray:
+        return values.astype(str).str.fullmatch(pattern).to_numpy(dtype=bool)
+    return validate
+
+
+def find_invalid_rows(df: pd.DataFrame, control_digits: bool = False) -> List[int]:
+    '''
+    Finds rows that have at least one invalid value.
+    Rows are numbered from 0, starting with the first data row, as calculate_checksum expects.
+    :param df: DataFrame with raw values
+    :param control_digits: Also verify control digits of the fields that have them
+    :return: Sorted numbers of invalid rows
+    '''
+    valid = np.ones(len(df), dtype=bool)
+    for column, validate in column_validators(list(df.columns), control_digits).items():
+        valid &= validate(df[column])
+    return np.flatnonzero(~valid).tolist()
+
+
+def validate_csv(csv_path: str, control_digits: bool = False, chunk_size: Optional[int] = None) -> List[int]:
+    '''
+    Finds invalid rows of the csv-file, reading it whole or by chunks.
+    :param csv_path: Path to csv-file
+    :param control_digits: Also verify control digits of the fields that have them
+    :param chunk_size: If set, the file is validated by chunks of this many rows
+    :return: Sorted numbers of invalid rows
+    '''
+    if chunk_size is None:
+        return find_invalid_rows(read_csv(csv_path), control_digits)
+    invalid_rows = []
+    offset = 0
+    for chunk in read_csv_chunks(csv_path, chunk_size):
+        invalid_rows.extend(row + offset for row in find_invalid_rows(chunk, control_digits))
+        offset += len(chunk)
+    return invalid_rows
+
+
+def main() -> None:
+    '''
+    Validates the csv-file, prints the checksum and writes it to result.json.
+    '''
+    try:
+        args = create_parser().parse_args()
+        invalid_rows = validate_csv(args.csv_path, args.control_digits, args.chunk_size)
+        checksum = calculate_checksum(invalid_rows)
+        print(f"Invalid rows: {len(invalid_rows)}, checksum: {checksum}")
+        serialize_result(args.variant, checksum)
+    except (FileNotFoundError, ValueError, OSError) as exc:
+        print(exc)
+
+
+if __name__ == '__main__':
+    main()